@@ -410,7 +410,7 @@ def compete(m1, m2, p0=(0.5, 0.5), y0=None, t=None, hours=24, num_of_points=100,
                         ci=ci, color=colors, ax=ax)
         ax.set_xlabel('Time (hour)')
         ax.set_ylabel('OD')
-        sns.despine()
+        sns.despine(ax=ax)
         return t,y,fig,ax
     return t,y#,infodict
 
@@ -25,6 +25,9 @@ import datetime
 import dateutil.parser
 from glob import glob
 import os.path
+import posixpath
+import zipfile
+from xml.etree import ElementTree
 from warnings import warn
 
 
@@ -50,6 +53,181 @@ def _fix_dtypes(df):
             df[col] = df[col].astype(str)
     
 
+def _xml_local_name(tag):
+    """Strips the namespace from an XML tag name, so that both transitional and strict OOXML files are supported."""
+    return tag.rsplit(u'}', 1)[-1]
+
+
+def _xml_text(elem):
+    """Gets the text of an XML text element, stripping white space unless it is explicitly preserved."""
+    text = elem.text or u''
+    if elem.get(u'{http://www.w3.org/XML/1998/namespace}space') != u'preserve':
+        text = text.strip()
+    return text
+
+
+def _xlsx_column_index(cell_ref):
+    """Converts an Excel cell reference such as ``AB12`` to a zero based column index."""
+    col = 0
+    for c in cell_ref:
+        if not c.isalpha():
+            break
+        col = col * 26 + ord(c.upper()) - ord(u'A') + 1
+    return col - 1
+
+
+def _xldate_as_datetime(xldate, datemode):
+    """Converts an Excel date number to a :py:class:`datetime.datetime`.
+
+    Parameters
+    ----------
+    xldate : float
+        the number of days since the workbook epoch.
+    datemode : int
+        0 for the 1900-based date system, 1 for the 1904-based date system.
+
+    Returns
+    -------
+    datetime.datetime
+    """
+    epoch = datetime.datetime(1904, 1, 1) if datemode else datetime.datetime(1899, 12, 30)
+    return epoch + datetime.timedelta(days=xldate)
+
+
+def _read_xlsx_shared_strings(zf):
+    """Reads the shared strings table of an Excel workbook, streaming it with :py:func:`xml.etree.ElementTree.iterparse`."""
+    try:
+        f = zf.open(u'xl/sharedStrings.xml')
+    except KeyError: # no strings in workbook
+        return []
+    strings = []
+    with f:
+        for _, elem in ElementTree.iterparse(f):
+            if _xml_local_name(elem.tag) != u'si':
+                continue
+            # rich text is split into runs, and phonetic runs are not part of the string
+            text = []
+            for child in elem:
+                tag = _xml_local_name(child.tag)
+                if tag == u't':
+                    text.append(_xml_text(child))
+                elif tag == u'r':
+                    text.extend(_xml_text(t) for t in child if _xml_local_name(t.tag) == u't')
+            strings.append(u''.join(text))
+            elem.clear()
+    return strings
+
+
+def _read_xlsx_rows(f, shared_strings):
+    """Reads the cell values of an Excel worksheet, streaming it with :py:func:`xml.etree.ElementTree.iterparse` one row at a time.
+
+    Numbers are read as :py:class:`float`, text as :py:class:`str` and booleans as :py:class:`bool`;
+    missing cells are filled with empty strings so that all rows have the same length, 
+    and empty rows after the last non-empty cell are dropped.
+    """
+    rows = []
+    ncols = 0
+    i = -1
+    for _, elem in ElementTree.iterparse(f):
+        if _xml_local_name(elem.tag) != u'row':
+            continue
+        i = int(elem.get(u'r', i + 2)) - 1
+        row = []
+        for cell in elem:
+            ref = cell.get(u'r')
+            j = _xlsx_column_index(ref) if ref else len(row)
+            value = u''
+            cell_type = cell.get(u't', u'n')
+            for child in cell:
+                tag = _xml_local_name(child.tag)
+                if tag == u'v' and child.text is not None:
+                    if cell_type == u'n':
+                        value = float(child.text)
+                    elif cell_type == u's':
+                        value = shared_strings[int(child.text)]
+                    elif cell_type == u'b':
+                        value = child.text == u'1'
+                    else:
+                        value = child.text
+                elif tag == u'is':
+                    value = u''.join(_xml_text(t) for t in child.iter() if _xml_local_name(t.tag) == u't')
+            if value == u'':
+                continue
+            row.extend([u''] * (j - len(row)))
+            row.append(value)
+        elem.clear()
+        if row:
+            rows.extend([] for _ in range(i - len(rows)))
+            rows.append(row)
+            ncols = max(ncols, len(row))
+    for row in rows:
+        row.extend([u''] * (ncols - len(row)))
+    return rows
+
+
+def _read_xlsx(filename):
+    """Reads the cell values of all the worksheets in an Excel xlsx file.
+
+    The worksheets are streamed directly from the xlsx zip archive rather than parsed into a DOM, 
+    which is much faster and uses much less memory than a full spreadsheet library.
+
+    Parameters
+    ----------
+    filename : str
+        path to the file.
+
+    Returns
+    -------
+    sheets : list of tuples
+        a ``(name, rows)`` tuple for each worksheet, in workbook order, where ``rows`` is a list of lists of cell values: 
+        :py:class:`float` for numbers, :py:class:`str` for text, :py:class:`bool` for booleans and an empty string for empty cells.
+    datemode : int
+        0 if the workbook uses the 1900-based date system, 1 if it uses the 1904-based date system.
+
+    Raises
+    ------
+    zipfile.BadZipfile
+        if the file is not a zip archive.
+    ValueError
+        if the file is a zip archive but not an Excel workbook.
+    """
+    with zipfile.ZipFile(filename) as zf:
+        try:
+            with zf.open(u'xl/workbook.xml') as f:
+                workbook = ElementTree.parse(f).getroot()
+            with zf.open(u'xl/_rels/workbook.xml.rels') as f:
+                rels = ElementTree.parse(f).getroot()
+        except KeyError as e:
+            raise ValueError("{0} is not an Excel workbook: {1}".format(filename, e.args[0]))
+        targets = {rel.get(u'Id'): rel.get(u'Target') for rel in rels}
+        datemode = 0
+        sheet_nodes = []
+        for elem in workbook.iter():
+            tag = _xml_local_name(elem.tag)
+            if tag == u'workbookPr':
+                datemode = int(elem.get(u'date1904', u'0').lower() in (u'1', u'true'))
+            elif tag == u'sheet':
+                sheet_nodes.append(elem)
+        shared_strings = _read_xlsx_shared_strings(zf)
+        sheets = []
+        for elem in sheet_nodes:
+            # the r:id attribute, its namespace differs between transitional and strict OOXML
+            rel_id = [v for k, v in elem.attrib.items() if _xml_local_name(k) == u'id'][0]
+            target = targets[rel_id]
+            if target.startswith(u'/'):
+                path = target.lstrip(u'/')
+            else:
+                path = posixpath.normpath(posixpath.join(u'xl', target))
+            try:
+                f = zf.open(path)
+            except KeyError as e:
+                raise ValueError("{0} is not an Excel workbook: {1}".format(filename, e.args[0]))
+            with f:
+                rows = _read_xlsx_rows(f, shared_strings)
+            sheets.append((elem.get(u'name'), rows))
+    return sheets, datemode
+
+
 def read_curveball_csv(filename, max_time=None, plate=None):
     """Reads growth measurements from a Curveball csv (comma separated values) file.
 
@@ -73,7 +251,7 @@ def read_curveball_csv(filename, max_time=None, plate=None):
         df[u'Strain'] = u'0'
     if plate is None and 'Color' not in df.columns:
         df[u'Color'] = u'#000000'
-    if max_time is not None:
+    if max_time is not None and max_time != np.inf:
         df = df[df.Time <= max_time]
     _fix_dtypes(df)
     return df
@@ -128,6 +306,8 @@ def read_tecan_xlsx(filename, label=u'OD', sheets=None, max_time=None, plate=Non
     ------
     ValueError
         if not data was parsed from the file.
+    zipfile.BadZipfile
+        if the file is not an xlsx file.
 
     Examples
     --------
@@ -137,58 +317,57 @@ def read_tecan_xlsx(filename, label=u'OD', sheets=None, max_time=None, plate=Non
     >>> df.shape
     (8544, 9)
     """
-    import xlrd
-    wb = xlrd.open_workbook(filename)
+    wb, datemode = _read_xlsx(filename)
     dateandtime = datetime.datetime.now() # default
 
     if isinstance(label, string_types):
         label = [label]
     if sheets is None:
-        sheets = range(wb.nsheets)
+        sheets = range(len(wb))
     if PRINT: print("Reading {0} worksheets from workbook {1}".format(len(sheets), filename))
     label_dataframes = []
     for lbl in label:
         sheet_dataframes = []        
         ## FOR sheet
         for sh_i in sheets:
-            sh = wb.sheet_by_index(sh_i)
-            if sh.nrows == 0:
+            sh_name, sh = wb[sh_i]
+            if len(sh) == 0:
                 continue # to next sheet
         
-            for i in range(sh.nrows):
+            for i in range(len(sh)):
                 ## FOR row
-                row = sh.row_values(i)
+                row = sh[i]
                 if row[0].startswith(u'Date'):
                     if isinstance(row[1], string_types):
                         date = ''.join(row[1:])
-                        next_row = sh.row_values(i + 1)
+                        next_row = sh[i + 1]
                         if next_row[0].startswith(u'Time'):
                             time = ''.join(next_row[1:])
                         else:
-                            warn(u"Warning: time row missing (sheet '{0}', row{1}), found row starting with {2}".format(sh.name, i, row[0]))
+                            warn(u"Warning: time row missing (sheet '{0}', row{1}), found row starting with {2}".format(sh_name, i, row[0]))
                         dateandtime = dateutil.parser.parse("%s %s" % (date, time))
                     elif isinstance(row[1], float):
-                        date_tuple = xlrd.xldate_as_tuple(row[1], wb.datemode)
-                        next_row = sh.row_values(i + 1)
+                        date_tuple = _xldate_as_datetime(row[1], datemode).timetuple()[:6]
+                        next_row = sh[i + 1]
                         if next_row[0].startswith(u'Time'):
                             time = tuple(map(int, next_row[1].split(':')))[:3]
                             date_tuple = date_tuple[:3] + time
                         else:
-                            warn(u"Warning: time row missing (sheet '{0}', row{1}), found row starting with {2}".format(sh.name, i, row[0]))
+                            warn(u"Warning: time row missing (sheet '{0}', row{1}), found row starting with {2}".format(sh_name, i, row[0]))
                         dateandtime = datetime.datetime(*date_tuple)
                     else:
-                        warn(u"Warning: date row (sheet '{2}', row {3}) could not be parsed: {0} {1}".format(row[1], type(row[1]), sh.name, i))
+                        warn(u"Warning: date row (sheet '{2}', row {3}) could not be parsed: {0} {1}".format(row[1], type(row[1]), sh_name, i))
                 if row[0] == lbl:
                     break
                 ## FOR row ENDS
             
             data = {}            
-            for j in range(i + 1, sh.nrows):
+            for j in range(i + 1, len(sh)):
                 ## FOR row
-                row = sh.row(j)
-                if not row[0].value:
+                row = sh[j]
+                if not row[0]:
                     break
-                data[row[0].value] = [x.value for x in row[1:] if x.ctype == 2]
+                data[row[0]] = [x for x in row[1:] if isinstance(x, float)]
                 ## FOR row ENDS
 
             if not data:
@@ -219,7 +398,7 @@ def read_tecan_xlsx(filename, label=u'OD', sheets=None, max_time=None, plate=Non
         if PRINT:
             print("Starting time", min_time)
         df.Time = [(t - min_time).total_seconds() / 3600.0 for t in df.Time]
-        if max_time is not None:
+        if max_time is not None and max_time != np.inf:
             df = df[df.Time <= max_time]
         df.sort_values([u'Row', u'Col', u'Time'], inplace=True)
         label_dataframes.append((lbl,df))
@@ -299,7 +478,7 @@ def read_tecan_mat(filename, time_label=u'tps', value_label=u'plate_mat', value_
         df[u'Color'] = u'#000000'
     else:
         df = pd.merge(df, plate, on=(u'Row', u'Col'))
-    if not max_time:
+    if not max_time or max_time == np.inf:
         max_time = df.Time.max()
     df = df[df.Time < max_time]
     df.sort_values([u'Row', u'Col', u'Time'], inplace=True)    
@@ -394,7 +573,7 @@ def read_tecan_xml(filename, label=u'OD', max_time=None, plate=None):
         df[u'Color'] = u'#000000'
     else:
         df = pd.merge(df, plate, on=(u'Row', u'Col'))
-    if max_time is not None:
+    if max_time is not None and max_time != np.inf:
         df = df[df.Time <= max_time]
     df.sort_values([u'Row', u'Col', u'Time'], inplace=True)
     _fix_dtypes(df)
@@ -478,7 +657,7 @@ def read_sunrise_xlsx(filename, label=u'OD', max_time=None, plate=None):
         df[u'Color'] = u'#000000'
     else:
         df = pd.merge(df, plate, on=(u'Row', u'Col'))
-    if max_time is not None:
+    if max_time is not None and max_time != np.inf:
         df = df[df.Time <= max_time]
     df.sort_values([u'Row', u'Col', u'Time'], inplace=True)
     _fix_dtypes(df)
@@ -525,7 +704,7 @@ def read_biotek_xlsx(filename, max_time=None, plate=None, PRINT=False):
     min_time = df.Time.min()
     if PRINT:
         print("Starting time", min_time)
-    if max_time is not None:
+    if max_time is not None and max_time != np.inf:
         df = df[df.Time <= max_time]
     df.sort_values([u'Row', u'Col', u'Time'], inplace=True)
 
@@ -305,7 +305,7 @@ def lrtest(m0, m1, alfa=0.05):
     return prefer_m1, pval, D, ddf
 
 
-def find_max_growth(model_fit, params=None, after_lag=True):
+def find_max_growth(model_fit, params=None, after_lag=True, lag=None):
     r"""Estimates the maximum population and specific growth rates from the model fit.
 
     The function calculates the maximum population growth rate :math:`a=\max{\frac{dy}{dt}}` 
@@ -344,6 +344,9 @@ def find_max_growth(model_fit, params=None, after_lag=True):
         if provided, these parameters will override `model_fit`'s parameters
     after_lag : bool
         if true, only explore the time after the lag phase. Otherwise start at time zero. Defaults to :const:`True`.
+    lag : float, optional
+        the lag duration of `model_fit`, if it was already estimated with :py:func:`find_lag`; 
+        only used if `after_lag` is :const:`True`. If not given, it is estimated.
 
     Returns
     -------
@@ -370,7 +373,12 @@ def find_max_growth(model_fit, params=None, after_lag=True):
     y0 = params['y0'].value
     K  = params['K'].value
 
-    t0 = find_lag(model_fit) if after_lag else 0
+    if not after_lag:
+        t0 = 0
+    elif lag is None:
+        t0 = find_lag(model_fit)
+    else:
+        t0 = lag
     t0 = max(t0, 0)
     t1 = model_fit.userkws['t'].max()
     t = np.linspace(t0, t1)     
@@ -1125,8 +1133,8 @@ def fit_model(df, param_guess=None, param_min=None, param_max=None, param_fix=No
     method : str, optional
         the minimization method to use, defaults to `leastsq`, 
         can be anything accepted by :py:func:`lmfit.minimizer.Minimizer.minimize` or :py:func:`lmfit.minimizer.Minimizer.scalar_minimize`.
-    ax : matplotlib.axes.Axes, optional
-        an axes to plot into; if not provided, a new one is created.
+    ax : numpy.ndarray, optional
+        array of :py:class:`matplotlib.axes.Axes` objects to plot into, one for each model result, such as the `ax` returned by a previous call with the same `models`; if not provided, a new figure is created.
     PLOT : bool, optional
         if :const:`True`, the function will plot the all model fitting results.
     PRINT : bool, optional
@@ -1146,7 +1154,7 @@ def fit_model(df, param_guess=None, param_min=None, param_max=None, param_fix=No
     TypeError
         if one of the input parameters is of the wrong type (not guaranteed).
     ValueError
-        if the input is bad, for example, `df` is empty (not guaranteed).
+        if the input is bad, for example, `df` is empty (not guaranteed), or `ax` doesn't have an axes for each model result.
     AssertionError
         if any of the intermediate calculated values are inconsistent (for example, ``y0<0``).
 
@@ -1174,12 +1182,17 @@ def fit_model(df, param_guess=None, param_min=None, param_max=None, param_fix=No
     OD = df.OD.to_numpy()
     weights =  calc_weights(df) if use_weights else None
     # TODO why should we use weights if we use the whole data set?
-    ODerr = df.groupby('Time').OD.transform(lambda x: np.repeat(x.std(), len(x))).to_numpy()
    
     if models is None:
         models = get_models(curveball.baranyi_roberts_model)
     elif is_model(models):
         models = [models]
+    if 'r' not in param_guess and 'nu' not in param_guess and all(issubclass(m, curveball.baranyi_roberts_model.BaranyiRoberts) for m in models):
+        # guessing r smooths the data, which takes most of the fitting time; 
+        # without a guess for nu the guess for r is the same for all models, so guess it once
+        param_guess = dict(param_guess)
+        K = param_guess.get('K', OD[time == time.max()].mean())
+        param_guess['r'] = curveball.baranyi_roberts_model.guess_r(time, OD, K=K, nu=1.0)
     results = [None] * len(models)
     for i, model_class in enumerate(models):
         model = model_class()
@@ -1195,15 +1208,20 @@ def fit_model(df, param_guess=None, param_min=None, param_max=None, param_fix=No
     if PRINT:
         print(results[0].fit_report(show_correl=False))
     if PLOT:        
+        ODerr = df.groupby('Time').OD.transform('std').to_numpy()
         dy = df.OD.max() / 50.0
         dx = df.Time.max() / 25.0
         columns = min(3, len(results))
         rows = int(np.ceil(len(results) / columns))
         w = max(8, 4 * columns)
         h = max(6, 3*rows)
-        fig, ax = plt.subplots(rows, columns, sharex=True, sharey=True, figsize=(w, h))
-        if not hasattr(ax, '__iter__'):
-            ax = np.array(ax, ndmin=2)
+        if ax is None:
+            fig, ax = plt.subplots(rows, columns, sharex=True, sharey=True, figsize=(w, h))
+        elif np.size(ax) != rows * columns:
+            raise ValueError("ax must have {0} axes in a {1}x{2} grid, one for each of the {3} model results, but has {4}".format(rows * columns, rows, columns, len(results), np.size(ax)))
+        else:
+            fig = np.ravel(ax)[0].get_figure()
+        ax = np.reshape(ax, (rows, columns))
         for i,fit in enumerate(results):
             row = i // columns
             col = i % columns
@@ -1224,7 +1242,7 @@ def fit_model(df, param_guess=None, param_min=None, param_max=None, param_fix=No
                 _ax.set_xlabel('Time')
         _ax.set_xlim(0, 1.1 * df.Time.max())
         _ax.set_ylim(0.9 * df.OD.min(), 1.1 * df.OD.max())
-        sns.despine()
+        sns.despine(fig=fig)
         fig.tight_layout()
         return results, fig, ax
     return results
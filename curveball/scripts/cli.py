@@ -7,22 +7,25 @@
 # Licensed under the MIT license:
 # http://www.opensource.org/licenses/MIT-license
 # Copyright (c) 2015, Yoav Ram <yoav@yoavram.com>
-from builtins import map
 import sys
 import os.path
+import re
+import functools
 import pkg_resources
 import glob
+import hashlib
+import pickle
+import shutil
 import warnings
+import zipfile
+from xml.etree import ElementTree
+from concurrent.futures import ProcessPoolExecutor, as_completed
 # catch some future warnings, mostly caused by matplotlib
 warnings.simplefilter(action="ignore", category=FutureWarning)
 import curveball
 import numpy as np
 import pandas as pd
 import click
-import xlrd
-import matplotlib.pyplot as plt
-import seaborn as sns
-sns.set_style("ticks")
 
 
 VERBOSE = False
@@ -35,6 +38,40 @@ file_extension_handlers = {
 	'.xlsx': curveball.ioutils.read_tecan_xlsx,
 	'.csv': curveball.ioutils.read_curveball_csv,
 }
+# matches file names with an extension that has a handler
+_EXT_RE = re.compile('(?:' + '|'.join(re.escape(ext) for ext in file_extension_handlers) + r')\Z', re.IGNORECASE)
+# columns of the analyse output table
+summary_fields = (
+	'folder', 'filename', 'strain', 'model', 'RSS', 'RMSD', 'NRMSD', 'CV(RMSD)', 
+	'bic', 'aic', 'weighted_bic', 'weighted_aic', 'y0', 'K', 'r', 'nu', 'q0', 'v', 
+	'has_lag', 'has_nu', 'max_growth_rate', 'min_doubling_time', 'lag',
+)
+summary_ci_fields = (
+	'max_growth_rate_low', 'max_growth_rate_high', 'lag_low', 'lag_high', 
+	'min_doubling_time_low', 'min_doubling_time_high', 'K_low', 'K_high',
+)
+# types of the non-float columns of the analyse output table
+summary_field_types = {
+	'folder': object, 'filename': object, 'strain': object, 'model': object, 
+	'has_lag': bool, 'has_nu': bool,
+}
+
+
+def summary_dtype(ci=False):
+	"""Get the record type of a row of the analyse output table.
+
+	Parameters
+	----------
+	ci : bool, optional
+		if :const:`True`, include the confidence interval fields.
+
+	Returns
+	-------
+	numpy.dtype
+		structured dtype with a field for each column of the table, in order.
+	"""
+	fields = summary_fields + (summary_ci_fields if ci else ()) + ('w',)
+	return np.dtype([(field, summary_field_types.get(field, np.float64)) for field in fields])
 
 
 def echo_error(message):
@@ -118,10 +155,14 @@ def load_plate(plate_path):
 	find_plate_file
 	"""	
 	try:
-		plate = pd.read_csv(plate_path)
+		try:
+			plate = pd.read_csv(plate_path, engine='pyarrow')
+		except (ImportError, ValueError):
+			# pyarrow isn't installed or failed parsing the file, let the C parser try and report errors
+			plate = pd.read_csv(plate_path)
 	except IOError as e:
 		ioerror_to_click_exception(e)
-	except pd.parser.CParserError as e:
+	except pd.errors.ParserError as e:
 		raise click.FileError(plate_path, hint="parser error, probably not a CSV file, {0}".format(e.args[0]))
 	return plate
 
@@ -188,6 +229,7 @@ def plate(plate_folder, plate_file, output_file, list, show):
 	plate_path = find_plate_file(plate_folder, plate_file)
 	plate = load_plate(plate_path)
 	if show:
+		plt = _ensure_style()
 		fig, ax = curveball.plots.plot_plate(plate)
 		if output_file.name == '-':
 			plt.show()
@@ -213,15 +255,16 @@ def plate(plate_folder, plate_file, output_file, list, show):
 @click.option('--weights/--no-weights', default=False, help="use weights for the fitting procedure")
 @click.option('--ci/--no-ci', default=False, help="find confidence intervals for lag and max growth rate")
 @click.option('--nsamples', default=1000, help="number of bootstrap samples to use, only applicable when using --ci")
+@click.option('--cache/--no-cache', default=True, help="cache parsed data files and plots next to the data files to speed up later runs")
+@click.option('--ncores', default=os.cpu_count(), type=click.IntRange(min=1), help="number of processes used to analyse files in parallel, defaults to the number of CPUs")
 @cli.command()
-def analyse(path, output_file, plate_folder, plate_file, blank_strain, ref_strain, max_time, guess, param_min, param_max, param_fix, weights, ci, nsamples):
+def analyse(path, output_file, plate_folder, plate_file, blank_strain, ref_strain, max_time, guess, param_min, param_max, param_fix, weights, ci, nsamples, cache, ncores):
 	"""Analyse growth curves data using Curveball.
 
 	To get help for the parameters, run:
 
 	>>> curveball plate --help
 	"""
-	results = []
 	plate_path = find_plate_file(plate_folder, plate_file)
 
 	if VERBOSE:
@@ -232,76 +275,312 @@ def analyse(path, output_file, plate_folder, plate_file, blank_strain, ref_strai
 		click.echo('-' * 40)
 	
 	plate = load_plate(plate_path)
-	plate.Strain = list(map(str, plate.Strain))
-	plate_strains = plate.Strain.unique().tolist()	
+	plate['Strain'] = plate['Strain'].astype(str)
+	plate_strains = plate['Strain'].unique().tolist()
 	if PROMPT:
 		fig,ax = curveball.plots.plot_plate(plate)
 		fig.show()
 		click.echo("Plate with %d strains: %s" % (len(plate_strains), ', '.join(plate_strains)))
 		click.confirm('Is this the plate you wanted?', default=False, abort=True, show_default=True)
 	if os.path.isdir(path):
-		files = glob.glob(os.path.join(path, '*'))
-		#files = [os.path.join(path, fn) for fn in files]
+		files = [entry.path for entry in os.scandir(path) if entry.is_file() and _EXT_RE.search(entry.name)]
 	else:
-		files = glob.glob(path)
-	
-	files = [fn for fn in files if os.path.splitext(fn)[-1].lower() in file_extension_handlers.keys()]
+		files = [fn for fn in glob.iglob(path) if _EXT_RE.search(fn)]
+	files.sort()
 	if not files:
 		raise click.ClickException("No data files found in folder {0}".format(click.format_filename(path)))
 	
-	with click.progressbar(files, label='Processing files:', item_show_func=get_filename, color='green') as bar:
-		for filepath in bar:
-			file_results = _process_file(filepath, plate, blank_strain, ref_strain, max_time, guess, param_min, param_max, param_fix, weights, ci, nsamples)
-			results.extend(file_results)
-	
-	output_table = pd.DataFrame(results)
-	output_table.to_csv(output_file, index=False)
-	if VERBOSE and output_file.name != '-':
+	file_results = {}
+	num_written = 0
+	num_rows = 0
+	# stdout is shared with the progress messages, so the table is written to it at the end
+	stdout_tables = [] if output_file.name == '-' else None
+	max_workers = min(ncores, len(files))
+	args = (blank_strain, ref_strain, max_time, guess, param_min, param_max, param_fix, weights, ci, nsamples, cache)
+	file_results_iter = _iter_file_results(files, max_workers, plate, plate_strains, args)
+	with click.progressbar(file_results_iter, length=len(files), label='Processing files:', item_show_func=lambda item: get_filename(item[0] if item else None), color='green') as bar:
+		for filepath, file_result in bar:
+			file_results[filepath] = file_result
+			# write the results of each file once the files before it are written, to keep the input order
+			while num_written < len(files) and files[num_written] in file_results:
+				file_result = file_results.pop(files[num_written])
+				num_written += 1
+				if len(file_result) == 0:
+					continue
+				output_table = pd.DataFrame.from_records(file_result)
+				if stdout_tables is not None:
+					stdout_tables.append(output_table)
+				else:
+					output_table.to_csv(output_file, header=num_rows == 0, index=False)
+					output_file.flush()
+				num_rows += len(file_result)
+	if stdout_tables:
+		pd.concat(stdout_tables).to_csv(output_file, index=False)
+	if num_rows == 0:
+		echo_error("Warning, no results, output not written")
+	elif VERBOSE and output_file.name != '-':
 		click.secho("Wrote output to %s" % output_file.name, fg='green')
 
 
-def _process_file(filepath, plate, blank_strain, ref_strain, max_time, guess, param_min, param_max, param_fix, weights, ci, nsamples):
+@functools.lru_cache(maxsize=None)
+def _ensure_style():
+	"""Imports pyplot and sets the plotting style, once per process.
+
+	The font family is set to DejaVu Sans, which ships with matplotlib, 
+	so that fonts are not looked up on the system.
+
+	Returns
+	-------
+	module
+		:py:mod:`matplotlib.pyplot`.
+	"""
+	import matplotlib.pyplot as plt
+	import seaborn as sns
+	sns.set_style("ticks")
+	plt.rcParams['font.family'] = 'DejaVu Sans'
+	return plt
+
+
+_worker_plate = None
+_worker_plate_strains = None
+
+
+def _init_worker(plate, plate_strains, verbose, plot):
+	"""Initializes a worker process of the :py:func:`analyse` process pool.
+
+	The plate template and its strains are stored in the worker once instead of being pickled with every task,
+	and the flags set by :py:func:`cli` are copied as they are not inherited by spawned processes.
+	"""
+	global _worker_plate
+	_worker_plate = plate
+	global _worker_plate_strains
+	_worker_plate_strains = plate_strains
+	global VERBOSE
+	VERBOSE = verbose
+	global PLOT
+	PLOT = plot
+	if PLOT:
+		# workers save figures to files, no need for a GUI backend
+		import matplotlib
+		matplotlib.use('Agg')
+
+
+def _process_file_in_worker(filepath, blank_strain, ref_strain, max_time, guess, param_min, param_max, param_fix, weights, ci, nsamples, cache):
+	"""Analyses a single growth curves file in a worker process, using the plate template set by :py:func:`_init_worker`.
+
+	See also
+	--------
+	_process_file
+	"""
+	return _process_file(filepath, _worker_plate, _worker_plate_strains, blank_strain, ref_strain, max_time, guess, param_min, param_max, param_fix, weights, ci, nsamples, cache)
+
+
+def _iter_file_results(files, max_workers, plate, plate_strains, args):
+	"""Analyses growth curves files, in a process pool if `max_workers` is more than one.
+
+	If analysing a file fails, files that didn't start yet are cancelled before the error is raised.
+
+	Parameters
+	----------
+	files : list of str
+		paths of the data files.
+	max_workers : int
+		maximum number of worker processes; with one worker the files are analysed in the current process.
+	plate : pandas.DataFrame
+		the plate template.
+	plate_strains : list of str
+		the strains in `plate`.
+	args : tuple
+		the rest of the arguments of :py:func:`_process_file`, starting with `blank_strain`.
+
+	Yields
+	------
+	tuple
+		the path of a file and its results, in the order the files are done.
+	"""
+	if max_workers == 1:
+		for filepath in files:
+			yield filepath, _process_file(filepath, plate, plate_strains, *args)
+		return
+	executor = ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(plate, plate_strains, VERBOSE, PLOT))
+	futures = {}
+	try:
+		for filepath in files:
+			futures[executor.submit(_process_file_in_worker, filepath, *args)] = filepath
+		for future in as_completed(futures):
+			yield futures[future], future.result()
+	except BaseException:
+		# don't wait for the rest of the files to be analysed before reporting the error
+		for future in futures:
+			future.cancel()
+		raise
+	finally:
+		executor.shutdown(wait=True)
+
+
+def _cached_read(handler, filepath, plate, max_time):
+	"""Reads a data file with `handler`, caching the result in a pickle file next to the data file.
+
+	The cache file is named ``<filepath>.<hash>.<max_time>.pkl``, where ``hash`` is the SHA-1 of the contents of the data file, of the plate template, 
+	of the name of `handler` and of the Curveball version, so that upgrading Curveball invalidates the cache.
+	Cache files of the same data file with a different hash are stale and are removed.
+
+	Parameters
+	----------
+	handler : func
+		one of the functions in `file_extension_handlers`.
+	filepath : str
+		path to the data file.
+	plate : pandas.DataFrame
+		the plate template.
+	max_time : float
+		omit data after `max_time` hours.
+
+	Returns
+	-------
+	pandas.DataFrame
+		the data read by `handler`.
+	"""
+	sha1 = hashlib.sha1()
+	with open(filepath, 'rb') as f:
+		sha1.update(f.read())
+	sha1.update(plate.to_csv(index=False).encode('utf8'))
+	sha1.update('{0}.{1}'.format(handler.__module__, handler.__qualname__).encode('utf8'))
+	sha1.update(curveball.__version__.encode('utf8'))
+	cache_prefix = '{0}.{1}.'.format(filepath, sha1.hexdigest())
+	cache_path = '{0}{1}.pkl'.format(cache_prefix, max_time)
+	if os.path.exists(cache_path):
+		try:
+			with open(cache_path, 'rb') as f:
+				return pickle.load(f)
+		except Exception as e:
+			# corrupt file or pickled by another version of pandas
+			echo_info("Ignoring cache file %s: %s" % (click.format_filename(cache_path), e))
+	# only remove cache files saved by this function, named by a SHA-1 hex digest
+	cache_re = re.compile(re.escape(filepath) + r'\.[0-9a-f]{40}\..+\.pkl\Z')
+	for stale_path in glob.glob(glob.escape(filepath) + '.*.pkl'):
+		if cache_re.match(stale_path) and not stale_path.startswith(cache_prefix):
+			try:
+				os.remove(stale_path)
+			except OSError as e:
+				echo_info("Failed removing stale cache file %s: %s" % (click.format_filename(stale_path), e))
+
+	df = handler(filepath, plate=plate, max_time=max_time)
+
+	try:
+		with open(cache_path, 'wb') as f:
+			pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+	except (IOError, OSError) as e:
+		echo_info("Failed writing cache file %s: %s" % (click.format_filename(cache_path), e))
+	return df
+
+
+def _plot_digest(df):
+	"""Gets the SHA-1 hex digest of data to plot and of the Curveball version, used to name cached images by :py:func:`_cached_plot`.
+
+	Parameters
+	----------
+	df : pandas.DataFrame
+		the data to plot.
+
+	Returns
+	-------
+	str
+		the hex digest.
+	"""
+	sha1 = hashlib.sha1(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+	sha1.update(str(df.columns.tolist()).encode('utf8'))
+	sha1.update(curveball.__version__.encode('utf8'))
+	return sha1.hexdigest()
+
+
+def _cached_plot(plot_func, df, digest, output_filename):
+	"""Plots data to a file, reusing the image of a previous run on the same data if it exists.
+
+	The image is saved to ``<output_filename base>.<digest>.png`` and copied to `output_filename`; 
+	images saved for other data are removed.
+
+	Parameters
+	----------
+	plot_func : callable
+		plotting function that accepts the data and an `output_filename` keyword argument, i.e. :py:func:`curveball.plots.plot_wells`.
+	df : pandas.DataFrame
+		the data to plot.
+	digest : str
+		the digest of `df`, from :py:func:`_plot_digest`.
+	output_filename : str
+		the path of the output image.
+	"""
+	base, ext = os.path.splitext(output_filename)
+	cache_path = '{0}.{1}{2}'.format(base, digest, ext)
+	if not os.path.exists(cache_path):
+		# only remove images saved by this function, named by a SHA-1 hex digest
+		hash_re = re.compile(r'\.[0-9a-f]{40}' + re.escape(ext) + r'\Z')
+		for stale_path in glob.glob(glob.escape(base) + '.*' + ext):
+			if hash_re.match(stale_path, len(base)):
+				try:
+					os.remove(stale_path)
+				except OSError as e:
+					echo_info("Failed removing stale plot file %s: %s" % (click.format_filename(stale_path), e))
+		plot_func(df, output_filename=cache_path)
+	shutil.copyfile(cache_path, output_filename)
+
+
+def _process_file(filepath, plate, plate_strains, blank_strain, ref_strain, max_time, guess, param_min, param_max, param_fix, weights, ci, nsamples, cache):
 	"""Analyses a single growth curves file.
 
 	See also
 	--------
 	analyse
 	"""
-	results = []	
+	results = np.empty(0, dtype=summary_dtype(ci))
 	fn, ext = os.path.splitext(filepath)
 	echo_info("\tHandler: {1}\n".format(filepath, ext))
-	handler = file_extension_handlers.get(ext)
+	handler = file_extension_handlers.get(ext.lower())
 	if handler is None:
 		echo_info("No handler found for file {0}".format(click.format_filename(filepath)))
 		return results
 	try: 
-		if np.isfinite(max_time):			
-			df = handler(filepath, plate=plate, max_time=max_time)
+		if cache:
+			df = _cached_read(handler, filepath, plate, max_time)
 		else:
-			df = handler(filepath, plate=plate)
+			df = handler(filepath, plate=plate, max_time=max_time)
 	except IOError as e:
 		ioerror_to_click_exception(e)
-	except xlrd.biffh.XLRDError as e:
+	except (zipfile.BadZipfile, ElementTree.ParseError, ValueError) as e:
 		raise click.FileError(filepath, hint="parser error, probably not a {1} file, {0}".format(e.args[0], ext))
 
-	strains = plate.Strain.unique().tolist()
+	strains = list(plate_strains)
 
 	if blank_strain is not None and blank_strain != 'none': 
 		if blank_strain in strains:
-			bg = df[(df.Strain == blank_strain) & (df.Time == df.Time.min())]
-			bg = bg.OD.mean()
-			df.OD -= bg
-			df.loc[df.OD < 0, 'OD'] = 0
+			od = df['OD'].to_numpy(dtype=float, copy=True)
+			time = df['Time'].to_numpy()
+			bg = od[(df['Strain'].to_numpy() == blank_strain) & (time == time.min())].mean()
+			np.subtract(od, bg, out=od)
+			np.clip(od, 0, None, out=od)
+			df['OD'] = od
 		else:
 			echo_error("Warning! Blank strain '%s' doesn't exist" % blank_strain)
 
 	if PLOT:
+		plt = _ensure_style()
+
+		# both plots are of the same data, so hash it once
+		digest = _plot_digest(df) if cache else None
+
 		wells_plot_fn = fn + '_wells.png'
-		g = curveball.plots.plot_wells(df, output_filename=wells_plot_fn)
+		if cache:
+			_cached_plot(curveball.plots.plot_wells, df, digest, wells_plot_fn)
+		else:
+			g = curveball.plots.plot_wells(df, output_filename=wells_plot_fn)
 		echo_info("Wrote wells plot to %s" % click.format_filename(wells_plot_fn))
 
 		strains_plot_fn = fn + '_strains.png'
-		g = curveball.plots.plot_strains(df, output_filename=strains_plot_fn)
+		if cache:
+			_cached_plot(curveball.plots.plot_strains, df, digest, strains_plot_fn)
+		else:
+			g = curveball.plots.plot_strains(df, output_filename=strains_plot_fn)
 		echo_info("Wrote strains plot to %s" % click.format_filename(strains_plot_fn))
 	
 	if blank_strain in strains: 
@@ -312,18 +591,28 @@ def _process_file(filepath, plate, blank_strain, ref_strain, max_time, guess, pa
 	else:
 		echo_error("Warning, reference strains '%s' doesn't exist!" % ref_strain)
 
-	for strain in strains:
-		strain_df = df[df.Strain == strain]
-		_ = curveball.models.fit_model(strain_df, param_guess=guess, param_min=param_min, param_max=param_max, param_fix=param_fix, use_weights=weights, PLOT=PLOT, PRINT=VERBOSE)
+	strain_groups = df.groupby('Strain', sort=False)
+	strain_to_color = dict(plate.drop_duplicates('Strain').set_index('Strain')['Color'])
+	# figures are created on first use and reused for all strains in the file
+	fit_ax = None
+	competition_ax = None
+	results = np.zeros(len(strains), dtype=results.dtype)
+	# w is missing if there is no reference strain
+	results['w'] = np.nan
+	for i, strain in enumerate(strains):
+		strain_df = strain_groups.get_group(strain)
+		_ = curveball.models.fit_model(strain_df, param_guess=guess, param_min=param_min, param_max=param_max, param_fix=param_fix, use_weights=weights, ax=fit_ax, PLOT=PLOT, PRINT=VERBOSE)
 		if PLOT:
-			fit_results,fig,ax = _
+			fit_results,fig,fit_ax = _
 			strain_plot_fn = fn + ('_strain_%s.png' % strain)
-			fig.savefig(strain_plot_fn)
+			fig.savefig(strain_plot_fn, dpi=100, format='png')
+			for ax in fit_ax.flat:
+				ax.cla()
 			echo_info("Wrote strain %s plot to %s" % (strain, click.format_filename(strain_plot_fn)))
 		else:
 			fit_results = _
 
-		res = {}
+		res = results[i]
 		fit = fit_results[0]
 		res['folder'] = os.path.dirname(filepath)
 		res['filename'] = os.path.splitext(os.path.basename(fn))[0]
@@ -346,9 +635,10 @@ def _process_file(filepath, plate, blank_strain, ref_strain, max_time, guess, pa
 		res['v'] = params['v'].value if 'v' in params else 0
 		res['has_lag'] = curveball.models.has_lag(fit_results)
 		res['has_nu'] = curveball.models.has_nu(fit_results, PRINT=VERBOSE)
-		res['max_growth_rate'] = curveball.models.find_max_growth(fit)[-1]
+		lag = curveball.models.find_lag(fit)
+		res['max_growth_rate'] = curveball.models.find_max_growth(fit, lag=lag)[-1]
 		res['min_doubling_time'] = curveball.models.find_min_doubling_time(fit)
-		res['lag'] = curveball.models.find_lag(fit)
+		res['lag'] = lag
 		if ci:
 			param_samples = curveball.models.bootstrap_params(strain_df, fit, nsamples=nsamples)
 			_, _, low, high = curveball.models.find_max_growth_ci(fit, param_samples)
@@ -368,19 +658,24 @@ def _process_file(filepath, plate, blank_strain, ref_strain, max_time, guess, pa
 			ref_fit = fit
 			res['w'] = 1
 		elif ref_strain in strains:
-			colors = plate[plate.Strain.isin([strain, ref_strain])].Color.unique()
-			_ = curveball.competitions.compete(fit, ref_fit, hours=df.Time.max(), colors=colors, PLOT=PLOT)
+			colors = np.array([strain_to_color[strain], strain_to_color[ref_strain]])
+			if PLOT and competition_ax is None:
+				_, competition_ax = plt.subplots(1, 1)
+			_ = curveball.competitions.compete(fit, ref_fit, hours=df.Time.max(), colors=colors, ax=competition_ax, PLOT=PLOT)
 			if PLOT:
 				t,y,fig,ax = _
 				competition_plot_fn = fn + ('_%s_vs_%s.png' % (strain, ref_strain))
-				fig.savefig(competition_plot_fn)
-				echo_info("Wrote competition %s vs %s plot to %s" % (strain, ref_strain, click.format_filename(strain_plot_fn)))
+				fig.savefig(competition_plot_fn, dpi=100, format='png')
+				ax.cla()
+				echo_info("Wrote competition %s vs %s plot to %s" % (strain, ref_strain, click.format_filename(competition_plot_fn)))
 			else:
 				t,y = _
 			res['w'] = curveball.competitions.fitness_LTEE(y, assay_strain=0, ref_strain=1)
 			# TODO CI for w
-		results.append(res)
-		plt.clf()
+	if fit_ax is not None:
+		plt.close(fit_ax.flat[0].get_figure())
+	if competition_ax is not None:
+		plt.close(competition_ax.get_figure())
 	return results
 
 
@@ -9,6 +9,7 @@ from builtins import map
 # http://www.opensource.org/licenses/MIT-license
 # Copyright (c) 2015, Yoav Ram <yoav@yoavram.com>
 from unittest import TestCase, main
+from unittest import mock
 from nose.plugins.skip import SkipTest
 import os
 import glob
@@ -115,6 +116,24 @@ class PlateTestCase(TestCase):
 			self.assertIn(filename, result.output)
 
 
+	def test_plate_modified_between_loads(self):
+		filename = 'plate.csv'
+		plate = pd.read_csv(pkg_resources.resource_filename('plate_templates', 'checkerboard.csv'))
+		with self.runner.isolated_filesystem():
+			plate.to_csv(filename, index=False)
+			result = self.runner.invoke(cli.cli, ['plate', '--plate_folder=.', '--plate_file={0}'.format(filename)])
+			self.assertEqual(result.exit_code, 0, result.output)
+			self.assertNotIn('modified', result.output)
+			plate['Strain'] = 'modified'
+			plate.to_csv(filename, index=False)
+			mtime = os.path.getmtime(filename) + 10
+			os.utime(filename, (mtime, mtime))
+			result = self.runner.invoke(cli.cli, ['plate', '--plate_folder=.', '--plate_file={0}'.format(filename)])
+			self.assertEqual(result.exit_code, 0, result.output)
+			self._is_plate_csv(result.output)
+			self.assertIn('modified', result.output)
+
+
 	def test_plate_list(self):
 		result = self.runner.invoke(cli.cli, ['plate', '--list'])
 		self.assertEqual(result.exit_code, 0)
@@ -238,6 +257,107 @@ class AnalysisTestCase(TestCase):
 		self.assertTrue(is_csv(data))
 
 
+	def test_process_file_cache(self):
+		args = ['--no-plot', '--no-prompt', 'analyse', self.filepath, '--plate_file=G-RG-R.csv', '--ref_strain=G']
+		result = self.runner.invoke(cli.cli, args)
+		self.assertEqual(result.exit_code, 0, "Code: {}\n{}".format(result.exit_code, result.output))
+		cache_files = glob.glob(self.filepath + '.*.pkl')
+		self.assertEqual(len(cache_files), 1)
+		cached_result = self.runner.invoke(cli.cli, args)
+		self.assertEqual(cached_result.exit_code, 0, "Code: {}\n{}".format(cached_result.exit_code, cached_result.output))
+		self.assertEqual(glob.glob(self.filepath + '.*.pkl'), cache_files)
+		self.assertEqual(result.output.splitlines()[-3:], cached_result.output.splitlines()[-3:])
+
+
+	def test_cached_read_invalidated_by_version(self):
+		calls = []
+		def handler(filepath, plate, max_time):
+			calls.append(filepath)
+			return pd.DataFrame({'Time': [0.0], 'OD': [0.1]})
+		plate = pd.read_csv(pkg_resources.resource_filename('plate_templates', 'G-RG-R.csv'))
+		cli._cached_read(handler, self.filepath, plate, float('inf'))
+		cli._cached_read(handler, self.filepath, plate, float('inf'))
+		self.assertEqual(len(calls), 1)
+		cache_files = glob.glob(self.filepath + '.*.pkl')
+		with mock.patch.object(curveball, '__version__', curveball.__version__ + '.new'):
+			cli._cached_read(handler, self.filepath, plate, float('inf'))
+		self.assertEqual(len(calls), 2)
+		new_cache_files = glob.glob(self.filepath + '.*.pkl')
+		self.assertEqual(len(new_cache_files), 1)
+		self.assertNotEqual(new_cache_files, cache_files)
+
+
+	def test_cached_read_stale(self):
+		def handler(filepath, plate, max_time):
+			return pd.DataFrame({'Time': [0.0], 'OD': [0.1]})
+		plate = pd.read_csv(pkg_resources.resource_filename('plate_templates', 'G-RG-R.csv'))
+		stale_path = self.filepath + '.' + '0' * 40 + '.inf.pkl'
+		open(stale_path, 'wb').close()
+		user_path = self.filepath + '.my_notes.pkl'
+		open(user_path, 'wb').close()
+		with mock.patch.object(cli.os, 'remove', side_effect=OSError('read-only file system')):
+			df = cli._cached_read(handler, self.filepath, plate, float('inf'))
+		self.assertEqual(len(df), 1)
+		self.assertTrue(os.path.exists(stale_path))
+		with mock.patch.object(curveball, '__version__', curveball.__version__ + '.new'):
+			cli._cached_read(handler, self.filepath, plate, float('inf'))
+		self.assertFalse(os.path.exists(stale_path))
+		self.assertTrue(os.path.exists(user_path))
+		self.assertEqual(len(glob.glob(self.filepath + '.*.pkl')), 2)
+
+
+	def test_process_file_no_cache(self):
+		result = self.runner.invoke(cli.cli, ['--no-plot', '--no-prompt', 'analyse', self.filepath, '--plate_file=G-RG-R.csv', '--ref_strain=G', '--no-cache'])
+		self.assertEqual(result.exit_code, 0, "Code: {}\n{}".format(result.exit_code, result.output))
+		self.assertEqual(len(glob.glob(self.filepath + '.*.pkl')), 0)
+
+
+	def test_cached_plot(self):
+		calls = []
+		def plot_func(df, output_filename):
+			calls.append(output_filename)
+			with open(output_filename, 'w') as f:
+				f.write(df.to_csv())
+		df = pd.DataFrame({'Time': [0.0, 1.0], 'OD': [0.1, 0.2], 'Well': ['A1', 'A1']})
+		filename = os.path.join(self.dirpath, 'plate_wells.png')
+		cli._cached_plot(plot_func, df, cli._plot_digest(df), filename)
+		cli._cached_plot(plot_func, df, cli._plot_digest(df), filename)
+		self.assertEqual(len(calls), 1)
+		self.assertTrue(os.path.exists(filename))
+		user_filename = os.path.join(self.dirpath, 'plate_wells.old.png')
+		open(user_filename, 'w').close()
+		df.loc[1, 'OD'] = 0.3
+		cli._cached_plot(plot_func, df, cli._plot_digest(df), filename)
+		self.assertEqual(len(calls), 2)
+		self.assertEqual(sorted(glob.glob(os.path.join(self.dirpath, 'plate_wells.*.png'))), sorted([calls[1], user_filename]))
+		with open(filename) as f:
+			self.assertEqual(f.read(), df.to_csv())
+
+
+	def test_cached_plot_stale_not_removable(self):
+		def plot_func(df, output_filename):
+			open(output_filename, 'w').close()
+		df = pd.DataFrame({'Time': [0.0], 'OD': [0.1], 'Well': ['A1']})
+		filename = os.path.join(self.dirpath, 'plate_wells.png')
+		stale_path = os.path.join(self.dirpath, 'plate_wells.' + '0' * 40 + '.png')
+		open(stale_path, 'w').close()
+		with mock.patch.object(cli.os, 'remove', side_effect=OSError('read-only file system')):
+			cli._cached_plot(plot_func, df, cli._plot_digest(df), filename)
+		self.assertTrue(os.path.exists(filename))
+		self.assertTrue(os.path.exists(stale_path))
+
+
+	def test_process_file_no_results(self):
+		plate = pd.read_csv(pkg_resources.resource_filename('plate_templates', 'G-RG-R.csv'))
+		plate['Strain'] = '0'
+		plate.to_csv('blank_plate.csv', index=False)
+		filename = 'summary.csv'
+		result = self.runner.invoke(cli.cli, ['--no-plot', '--no-prompt', 'analyse', self.filepath, '--plate_folder=.', '--plate_file=blank_plate.csv', '--output_file={0}'.format(filename)])
+		self.assertEqual(result.exit_code, 0, "Code: {}\n{}".format(result.exit_code, result.output))
+		self.assertIn('no results', result.output)
+		self.assertFalse(os.path.exists(filename))
+
+
 	# this test works but takes too long (10 min) see #129
 	def test_process_file_with_ci(self):
 		result = self.runner.invoke(cli.cli, [
@@ -271,6 +391,17 @@ class AnalysisTestCase(TestCase):
 		self.assertTrue(is_csv(data), result.output)
 		
 
+	def test_process_folder_single_core(self):
+		num_files = len(self.files)
+		result = self.runner.invoke(cli.cli, ['--no-plot', '--verbose', '--no-prompt', 
+			'analyse', self.dirpath, '--plate_file=G-RG-R.csv', '--ref_strain=G', '--ncores=1'])
+		self.assertEqual(result.exit_code, 0, "Code: {}\n{}".format(result.exit_code, result.output))
+		lines = [line for line in result.output.splitlines() if len(line) > 0] 
+		num_lines =  num_files * 3 + 1
+		data = os.linesep.join(lines[-num_lines:])
+		self.assertTrue(is_csv(data), result.output)
+
+
 	def test_path_not_found(self):
 		result = self.runner.invoke(cli.cli, ['analyse', 'untitled.xlsx'])
 		self.assertNotEquals(result.exit_code, 0)
@@ -286,6 +417,24 @@ class AnalysisTestCase(TestCase):
 		self.assertIn('.', result.output)
 
 
+	def test_process_folder_two_cores(self):
+		num_files = len(self.files)
+		result = self.runner.invoke(cli.cli, ['--no-plot', '--no-prompt', 
+			'analyse', self.dirpath, '--plate_file=G-RG-R.csv', '--ref_strain=G', '--ncores=2'])
+		self.assertEqual(result.exit_code, 0, "Code: {}\n{}".format(result.exit_code, result.output))
+		lines = [line for line in result.output.splitlines() if len(line) > 0] 
+		num_lines =  num_files * 3 + 1
+		data = os.linesep.join(lines[-num_lines:])
+		self.assertTrue(is_csv(data), result.output)
+
+
+	def test_bad_data_file_in_folder(self):
+		shutil.copyfile(__file__, 'untitled.xlsx')
+		result = self.runner.invoke(cli.cli, ['--no-plot', '--no-prompt', 'analyse', self.dirpath, '--plate_file=G-RG-R.csv', '--ref_strain=G', '--ncores=2'])
+		self.assertNotEqual(result.exit_code, 0)
+		self.assertIn('untitled.xlsx', result.output)
+
+
 	def test_bad_data_file(self):
 		shutil.copyfile(__file__, 'untitled.xlsx')
 		result = self.runner.invoke(cli.cli, ['analyse', 'untitled.xlsx'])
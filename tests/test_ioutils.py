@@ -10,6 +10,7 @@
 from unittest import TestCase, main
 from builtins import str
 import tempfile
+import datetime
 import os
 import shutil
 import zipfile
@@ -75,6 +76,82 @@ class TecanXLSXTestCase(TestCase):
         self.assertEqual(df.columns.tolist() , ['Time', u'Temp. [\xb0C]', 'Cycle Nr.', 'Well', 'OD', 'Row', 'Col', 'Strain', 'Color'])
 
 
+XLSX_MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+XLSX_REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+XLSX_STRICT_MAIN_NS = 'http://purl.oclc.org/ooxml/spreadsheetml/main'
+XLSX_STRICT_REL_NS = 'http://purl.oclc.org/ooxml/officeDocument/relationships'
+
+
+class XLSXTestCase(TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.filename = os.path.join(self.folder, 'test.xlsx')
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def _write_xlsx(self, sheet_data, shared_strings=None, main_ns=XLSX_MAIN_NS, rel_ns=XLSX_REL_NS, target='worksheets/sheet1.xml', workbook_pr=''):
+        workbook = ('<workbook xmlns="{0}" xmlns:r="{1}">{2}'
+                    '<sheets><sheet name="Sheet1" sheetId="1" r:id="rId1"/></sheets></workbook>').format(main_ns, rel_ns, workbook_pr)
+        rels = ('<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                '<Relationship Id="rId1" Type="{0}/worksheet" Target="{1}"/></Relationships>').format(rel_ns, target)
+        sheet = '<worksheet xmlns="{0}"><sheetData>{1}</sheetData></worksheet>'.format(main_ns, sheet_data)
+        with zipfile.ZipFile(self.filename, 'w') as zf:
+            zf.writestr('xl/workbook.xml', workbook)
+            zf.writestr('xl/_rels/workbook.xml.rels', rels)
+            zf.writestr('xl/worksheets/sheet1.xml', sheet)
+            if shared_strings is not None:
+                zf.writestr('xl/sharedStrings.xml', '<sst xmlns="{0}">{1}</sst>'.format(main_ns, shared_strings))
+
+    def test_read_xlsx_strings(self):
+        shared_strings = ('<si><t> plain </t></si>'
+                          '<si><r><t>Ri</t></r><r><rPr><b/></rPr><t xml:space="preserve">ch </t></r><rPh sb="0" eb="1"><t>x</t></rPh></si>')
+        self._write_xlsx('<row r="1"><c r="A1" t="s"><v>0</v></c><c r="B1" t="s"><v>1</v></c>'
+                         '<c r="C1" t="inlineStr"><is><t>inline</t></is></c></row>', shared_strings)
+        sheets, datemode = curveball.ioutils._read_xlsx(self.filename)
+        self.assertEqual(sheets, [('Sheet1', [['plain', 'Rich ', 'inline']])])
+
+    def test_read_xlsx_sparse(self):
+        self._write_xlsx('<row r="1"><c r="A1"><v>1</v></c></row>'
+                         '<row r="3"><c r="C3"><v>2.5</v></c></row>'
+                         '<row r="5"><c r="A5"/></row>')
+        sheets, datemode = curveball.ioutils._read_xlsx(self.filename)
+        rows = sheets[0][1]
+        self.assertEqual(rows, [[1.0, '', ''], ['', '', ''], ['', '', 2.5]])
+        self.assertIsInstance(rows[0][0], float)
+
+    def test_read_xlsx_booleans(self):
+        self._write_xlsx('<row r="1"><c r="A1" t="b"><v>1</v></c><c r="B1" t="b"><v>0</v></c></row>')
+        sheets, datemode = curveball.ioutils._read_xlsx(self.filename)
+        rows = sheets[0][1]
+        self.assertEqual(rows, [[True, False]])
+        self.assertIs(rows[0][0], True)
+        self.assertIs(rows[0][1], False)
+
+    def test_read_xlsx_date1904(self):
+        self._write_xlsx('<row r="1"><c r="A1"><v>1</v></c></row>')
+        self.assertEqual(curveball.ioutils._read_xlsx(self.filename)[1], 0)
+        self._write_xlsx('<row r="1"><c r="A1"><v>1</v></c></row>', workbook_pr='<workbookPr date1904="true"/>')
+        self.assertEqual(curveball.ioutils._read_xlsx(self.filename)[1], 1)
+        self.assertEqual(curveball.ioutils._xldate_as_datetime(1.5, 0), datetime.datetime(1899, 12, 31, 12))
+        self.assertEqual(curveball.ioutils._xldate_as_datetime(1.5, 1), datetime.datetime(1904, 1, 2, 12))
+
+    def test_read_xlsx_strict_absolute_target(self):
+        self._write_xlsx('<row r="1"><c r="A1" t="s"><v>0</v></c><c r="B1"><v>3</v></c></row>', '<si><t>strict</t></si>',
+                         main_ns=XLSX_STRICT_MAIN_NS, rel_ns=XLSX_STRICT_REL_NS, target='/xl/worksheets/sheet1.xml')
+        sheets, datemode = curveball.ioutils._read_xlsx(self.filename)
+        self.assertEqual(sheets, [('Sheet1', [['strict', 3.0]])])
+
+    def test_read_xlsx_not_workbook(self):
+        with zipfile.ZipFile(self.filename, 'w') as zf:
+            zf.writestr('readme.txt', 'not a workbook')
+        self.assertRaises(ValueError, curveball.ioutils._read_xlsx, self.filename)
+
+    def test_read_xlsx_missing_sheet(self):
+        self._write_xlsx('<row r="1"><c r="A1"><v>1</v></c></row>', target='worksheets/missing.xml')
+        self.assertRaises(ValueError, curveball.ioutils._read_xlsx, self.filename)
+
+
 class BioTekXLSXTestCase(TestCase):
     def setUp(self):
         self.filename = pkg_resources.resource_filename("data", "BioTekSynergy.xlsx")
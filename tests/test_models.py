@@ -128,6 +128,30 @@ class ModelSelectionTestCase(TestCase):
 		self.assertTrue(mean_residual(models[0]) < NOISE_STD)
 		
 
+	def test_fit_model_logistic_reuse_ax(self):
+		df = curveball.models.randomize(t=12, y0=0.1, K=1, r=0.75, nu=1, reps=REPS, noise_std=NOISE_STD, random_seed=RANDOM_SEED)
+		models,fig,ax = curveball.models.fit_model(df, PLOT=True, PRINT=False)
+		for _ax in ax.flat:
+			_ax.cla()
+		models,fig2,ax2 = curveball.models.fit_model(df, ax=ax, PLOT=True, PRINT=False)
+		self.assertIs(fig2, fig)
+		self.assertEqual(ax2.shape, ax.shape)
+		for _ax, _ax2 in zip(ax.flat, ax2.flat):
+			self.assertIs(_ax2, _ax)
+		filename = sys._getframe().f_code.co_name + ".png"
+		fig.savefig(filename)
+		self.assertTrue(check_image(filename))
+
+
+	def test_fit_model_logistic_bad_ax(self):
+		df = curveball.models.randomize(t=12, y0=0.1, K=1, r=0.75, nu=1, reps=REPS, noise_std=NOISE_STD, random_seed=RANDOM_SEED)
+		fig, ax = plt.subplots(1, 1)
+		with self.assertRaises(ValueError) as cm:
+			curveball.models.fit_model(df, ax=ax, PLOT=True, PRINT=False)
+		self.assertIn('grid', str(cm.exception))
+		plt.close(fig)
+
+
 	def test_fit_model_logistic_with_param_min(self):
 		df = curveball.models.randomize(t=12, y0=0.1, K=1, r=0.75, nu=1, reps=REPS, noise_std=NOISE_STD, random_seed=RANDOM_SEED)       
 		models,fig,ax = curveball.models.fit_model(df, PLOT=True, PRINT=True, param_min={'y0': 0.2})
@@ -401,6 +425,21 @@ class FindMaxGrowthTestCase(TestCase):
 		self.assertTrue(relative_error(r * (1 - y0 / K), mu) < 1, "mu=%.4g, r(1-y0/K)=%.4g" % (mu, r * (1 - y0 / K)))
 
 
+	def test_find_max_growth_with_lag(self):
+		y0 = 0.1
+		K = 1.0
+		r = 0.75
+		lam = 3.0
+		v = r
+		q0 = 1.0 /(np.exp(lam * v) - 1)
+		df = curveball.models.randomize(t=12, y0=y0, K=K, r=r, nu=1, q0=q0, v=v, reps=REPS, noise_std=NOISE_STD, random_seed=RANDOM_SEED)
+		model = curveball.baranyi_roberts_model.LogisticLag2()
+		model_fit = model.fit(df.OD, t=df.Time, y0=y0, K=K, r=r, q0=q0, v=v)
+		lag = curveball.models.find_lag(model_fit)
+		self.assertTrue(lag > 0, lag)
+		self.assertEqual(curveball.models.find_max_growth(model_fit, lag=lag), curveball.models.find_max_growth(model_fit))
+
+
 	def test_find_max_growth_ci_logistic(self):
 		y0 = 0.1
 		K = 1.0
@@ -731,6 +770,15 @@ class GuessTestCase(TestCase):
 		self.assertTrue(nu > 0)
 
 
+	def test_guess_r_shared_by_models(self):
+		df = curveball.models.randomize(t=12, y0=0.1, K=1, r=0.75, nu=1.0, reps=REPS, noise_std=NOISE_STD, random_seed=RANDOM_SEED)
+		models = curveball.models.fit_model(df, PLOT=False, PRINT=False)
+		df = df.sort_values(by=['Time', 'OD'])
+		r = curveball.baranyi_roberts_model.guess_r(df.Time.to_numpy(), df.OD.to_numpy(), K=df.OD[df.Time == df.Time.max()].mean(), nu=1.0)
+		for mod in models:
+			self.assertAlmostEqual(mod.init_values['r'], r)
+
+
 class WeightsTestCase(TestCase):
 	_multiprocess_can_split_ = True
 